@@ -0,0 +1,85 @@
+"""Startup benchmark for the EMA Alignment Scanner.
+
+Reports the cold import time of ema_scanner, the time to first render (a cold
+start of Streamlit plus the first full script run, as seen by a new browser
+session) and the slowest modules ema_scanner imports. Every sample runs in a
+fresh interpreter. The first render uses an empty local price directory so
+that network latency is not part of the measurement.
+
+Usage:
+    python bench_startup.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import ema_scanner
+print(time.perf_counter() - start)
+"""
+
+RENDER_SNIPPET = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file('ema_scanner.py', default_timeout=120)
+app.run()
+print(time.perf_counter() - start)
+"""
+
+# Function to run a snippet in a fresh interpreter and return its timing
+def run_sample(snippet, env, python_args=()):
+    result = subprocess.run(
+        [sys.executable, *python_args, "-c", snippet],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1]), result.stderr
+
+# Function to list the slowest imports made by ema_scanner from python -X importtime output
+def slowest_imports(importtime_output, module="ema_scanner", count=5):
+    # Children are printed before their parent, one indentation level (two spaces) deeper
+    children = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if level == 1:
+            children.append((int(cumulative), name.strip()))
+        elif level == 0:
+            if name.strip() == module:
+                return sorted(children, reverse=True)[:count]
+            children = []
+    return []
+
+# Main benchmark
+def main():
+    parser = argparse.ArgumentParser(description="Measure EMA Alignment Scanner start-up time")
+    parser.add_argument("--runs", type=int, default=5, help="number of samples per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as price_dir:
+        env = dict(os.environ, EMA_SCANNER_PROVIDER="directory", EMA_SCANNER_PRICE_DIR=price_dir)
+
+        import_times = [run_sample(IMPORT_SNIPPET, env)[0] for _ in range(args.runs)]
+        render_times = [run_sample(RENDER_SNIPPET, env)[0] for _ in range(args.runs)]
+        _, importtime_output = run_sample(IMPORT_SNIPPET, env, ("-X", "importtime"))
+
+    print(f"Import time:          median {statistics.median(import_times):.3f}s  "
+          f"min {min(import_times):.3f}s  ({args.runs} runs)")
+    print(f"Time to first render: median {statistics.median(render_times):.3f}s  "
+          f"min {min(render_times):.3f}s  ({args.runs} runs)")
+    print("Slowest imports in ema_scanner:")
+    for cumulative, name in slowest_imports(importtime_output):
+        print(f"  {name:<20} {cumulative / 1e6:.3f}s")
+
+# Run the benchmark
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,21 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import time
 import io
-import openpyxl
-from openpyxl.styles import Font, PatternFill
+import os
+import json
 import re
+import sqlite3
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
 
-# Page configuration 
-st.set_page_config(
-    page_title="EMA Alignment Scanner",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+# yfinance and openpyxl are imported where they are used so that start-up stays fast
 
-# Modern UI styling with blue theme
-st.markdown("""
+# Modern UI styling with blue theme (injected by main)
+APP_CSS = """
 <style>
     /* Overall page styling */
     .main {
@@ -187,7 +184,7 @@ st.markdown("""
         }
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # Define stock markets data
 us_indices = {
@@ -202,6 +199,51 @@ india_indices = {
     'NIFTY BANK': '^NSEBANK'
 }
 
+# Period of history requested for each timeframe
+TIMEFRAME_PERIODS = {
+    "1d": "500d",
+    "1wk": "7y",
+    "1h": "90d"
+}
+
+# Data provider settings
+DATA_PROVIDERS = {
+    "Yahoo Finance": "yfinance",
+    "Local Files (CSV/Parquet)": "directory",
+    "Local Database (Parquet/SQLite)": "database"
+}
+DEFAULT_DATA_PROVIDER = os.environ.get('EMA_SCANNER_PROVIDER', "yfinance")
+if DEFAULT_DATA_PROVIDER not in DATA_PROVIDERS.values():
+    raise ValueError(f"EMA_SCANNER_PROVIDER must be one of {', '.join(DATA_PROVIDERS.values())}, "
+                     f"not {DEFAULT_DATA_PROVIDER!r}")
+PRICE_DIRECTORY = os.environ.get('EMA_SCANNER_PRICE_DIR', os.path.join('data', 'prices'))
+PRICE_DATABASE = os.environ.get('EMA_SCANNER_PRICE_DB', os.path.join('data', 'prices.parquet'))
+PRICE_DATABASE_TABLE = "prices"
+
+# Exchange calendars used to decide when a new bar should exist
+MARKET_SESSIONS = {
+    "India": {"tz": "Asia/Kolkata", "calendar": "NSE"},
+    "US": {"tz": "America/New_York", "calendar": "NYSE"}
+}
+BAR_SETTLE_DELAY = 300  # Seconds the data provider needs to publish a closed bar
+QUOTE_INTERVAL_MINUTES = 5  # Refresh interval of the Market Status quotes during the session
+STOCK_LIST_FILES = ['data/us_stocks.xlsx', 'data/india_stocks.xlsx']
+
+# Shared price panel settings
+PANEL_DIR = os.path.join('data', 'panel')
+PANEL_FIELDS = ['Close', 'EMA20', 'EMA50', 'EMA100', 'EMA200']
+PANEL_MAX_BARS = 1000
+PANEL_MAX_SEGMENTS = 16  # Segments kept before the panel is compacted into one
+
+# Two-phase scan settings
+SCAN_MODES = {
+    "Two-Phase (refresh uncertain only)": True,
+    "Full Refresh": False
+}
+EMA_SPANS = [20, 50, 100, 200]
+VOLATILITY_LOOKBACK = 50  # Bars used to estimate how far one bar can move
+UNCERTAINTY_SIGMAS = 4  # Close moves beyond this many bar volatilities are treated as impossible
+
 # Function to sanitize symbols
 def sanitize_symbol(symbol):
     """Sanitize stock symbols to prevent injection attacks"""
@@ -230,12 +272,124 @@ def sanitize_name(name):
     
     return sanitized
 
+# Function to load the trading sessions of an exchange for one year
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _market_schedule(market, year):
+    """Map each trading day of the year to its (open, close), with holidays and early closes"""
+    import pandas_market_calendars as mcal
+    
+    session = MARKET_SESSIONS.get(market, MARKET_SESSIONS["US"])
+    tz = ZoneInfo(session['tz'])
+    schedule = mcal.get_calendar(session['calendar']).schedule(f"{year}-01-01", f"{year}-12-31")
+    
+    return {
+        day.date(): (row['market_open'].tz_convert(tz).to_pydatetime(), row['market_close'].tz_convert(tz).to_pydatetime())
+        for day, row in schedule.iterrows()
+    }
+
+# Function to get the closing times of the bars in one trading day
+def _bar_closes(market, timeframe, day):
+    session = _market_schedule(market, day.year).get(day)
+    if session is None:
+        return []
+    
+    open_time, close_time = session
+    if timeframe == "1d":
+        return [close_time]
+    if timeframe == "1wk":
+        # Weekly bars close with the last session of the week
+        later_days = [day + timedelta(days=offset) for offset in range(1, 7 - day.weekday())]
+        if any(_market_schedule(market, later.year).get(later) for later in later_days):
+            return []
+        return [close_time]
+    
+    # Intraday bars start at the open; the last bar is cut short by the close
+    minutes = 60 if timeframe == "1h" else QUOTE_INTERVAL_MINUTES
+    closes = []
+    bar_close = open_time + timedelta(minutes=minutes)
+    while bar_close < close_time:
+        closes.append(bar_close)
+        bar_close += timedelta(minutes=minutes)
+    closes.append(close_time)
+    
+    return closes
+
+# Function to find the most recent bar close
+def last_bar_close(market, timeframe, now):
+    """Return the epoch time at which the latest bar for this market and timeframe closed"""
+    session = MARKET_SESSIONS.get(market, MARKET_SESSIONS["US"])
+    day = datetime.fromtimestamp(now, ZoneInfo(session['tz'])).date()
+    
+    # Walk back over weekends and holidays (and the rest of the week for weekly bars)
+    for _ in range(14):
+        closes = [bar_close.timestamp() for bar_close in _bar_closes(market, timeframe, day)
+                  if bar_close.timestamp() <= now]
+        if closes:
+            return closes[-1]
+        day -= timedelta(days=1)
+    
+    return now
+
+# Function to find when the bar starting at a given time closes
+def bar_close_time(market, timeframe, bar_start):
+    tz = ZoneInfo(MARKET_SESSIONS.get(market, MARKET_SESSIONS["US"])['tz'])
+    start = pd.Timestamp(bar_start)
+    start = start.tz_localize(tz) if start.tzinfo is None else start.tz_convert(tz)
+    day = start.date()
+    
+    if timeframe == "1wk":
+        # A weekly bar closes with the last session of its week
+        week_closes = [bar_close for offset in range(7)
+                       for bar_close in _bar_closes(market, "1wk", day + timedelta(days=offset))]
+        return week_closes[0].timestamp() if week_closes else start.timestamp()
+    
+    session_closes = _bar_closes(market, "1d", day)
+    if not session_closes:
+        return start.timestamp()
+    if timeframe == "1h":
+        return min(start.timestamp() + 3600, session_closes[-1].timestamp())
+    return session_closes[-1].timestamp()
+
+# Function to get the freshness key for market data
+def data_as_of(market, timeframe, now=None, source_mtime=None):
+    """Earliest fetch time that is guaranteed to include the latest expected bar.
+    
+    Data fetched at or after this time stays current until the next bar closes, so the
+    value is used as a cache key: it only changes once a new bar should exist. For local
+    providers pass local_source_mtime, so files dropped in after a close count as new data.
+    """
+    now = time.time() if now is None else now
+    as_of = last_bar_close(market, timeframe, now - BAR_SETTLE_DELAY) + BAR_SETTLE_DELAY
+    return max(as_of, source_mtime) if source_mtime is not None else as_of
+
+# Function to count the bars that closed between two times
+def bars_closed_between(market, timeframe, start, end):
+    session = MARKET_SESSIONS.get(market, MARKET_SESSIONS["US"])
+    tz = ZoneInfo(session['tz'])
+    day = datetime.fromtimestamp(start, tz).date()
+    last_day = datetime.fromtimestamp(end, tz).date()
+    
+    count = 0
+    for _ in range(400):
+        if day > last_day:
+            break
+        count += sum(start < bar_close.timestamp() <= end for bar_close in _bar_closes(market, timeframe, day))
+        day += timedelta(days=1)
+    
+    return count
+
+# Function to get the last modification time of the stock list files
+def _stock_lists_mtime():
+    mtimes = [os.path.getmtime(path) for path in STOCK_LIST_FILES if os.path.exists(path)]
+    return max(mtimes) if mtimes else 0
+
 # Function to load stock lists
-@st.cache_data(ttl=86400)
-def load_stock_lists():
+@st.cache_data(max_entries=2)
+def load_stock_lists(mtime=None):
+    # mtime only keys the cache, so edited Excel files are picked up immediately
     # Load US Stocks from Excel
     try:
-        us_stocks = pd.read_excel('data/us_stocks.xlsx')
+        us_stocks = pd.read_excel(STOCK_LIST_FILES[0])
         if not all(col in us_stocks.columns for col in ['Symbol', 'Company Name']):
             # Try alternative column names
             column_mapping = {}
@@ -256,7 +410,7 @@ def load_stock_lists():
     
     # Load Indian Stocks from Excel
     try:
-        india_stocks = pd.read_excel('data/india_stocks.xlsx')
+        india_stocks = pd.read_excel(STOCK_LIST_FILES[1])
         if not all(col in india_stocks.columns for col in ['Symbol', 'Company Name']):
             # Try alternative column names
             column_mapping = {}
@@ -349,26 +503,213 @@ def process_uploaded_stock_list(uploaded_file, market):
         st.error(f"Error processing uploaded file: {e}")
         return None
 
+# Function to get the location of a local price source (None for network providers)
+def local_source_path(provider):
+    return PROVIDER_BACKENDS[provider]['source']
+
+# Function to check whether a provider reads local files
+def is_local_provider(provider):
+    return local_source_path(provider) is not None
+
+# Function to find when a local price source last changed
+def local_source_mtime(provider):
+    """Return the last modification time of a local source, or None if it does not exist.
+    
+    A directory is stat'ed file by file, so call this once per scan and pass the result on.
+    """
+    path = local_source_path(provider)
+    if path is None or not os.path.exists(path):
+        return None
+    if os.path.isdir(path):
+        return max([entry.stat().st_mtime for entry in os.scandir(path)] + [os.path.getmtime(path)])
+    return os.path.getmtime(path)
+
+# Function to standardize a local price table
+def _normalize_history(df):
+    """Rename local price columns to the yfinance layout and index rows by date"""
+    column_mapping = {}
+    for col in df.columns:
+        key = str(col).lower().replace(' ', '').replace('_', '')
+        if key in ['date', 'datetime', 'timestamp', 'time']:
+            column_mapping[col] = 'Date'
+        elif key in ['symbol', 'ticker']:
+            column_mapping[col] = 'Symbol'
+        elif key in ['open', 'high', 'low', 'close', 'volume']:
+            column_mapping[col] = key.title()
+    
+    df = df.rename(columns=column_mapping)
+    if 'Date' not in df.columns or 'Close' not in df.columns:
+        return None
+    
+    df = df[[col for col in ['Date', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume'] if col in df.columns]].copy()
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df.dropna(subset=['Close']).set_index('Date').sort_index()
+
+# Function to load a directory of per-symbol price files
+@st.cache_resource(max_entries=1, show_spinner=False)  # Only the current source version stays resident
+def _load_price_directory(path, mtime):
+    """Return ({symbol: history}, [skipped file names]) for a directory of price files.
+    
+    Cached as a shared resource; callers must copy a frame before modifying it.
+    """
+    frames = {}
+    skipped = []
+    for filename in sorted(os.listdir(path)):
+        name, ext = os.path.splitext(filename)
+        if ext.lower() not in ['.csv', '.parquet']:
+            continue
+        
+        # One unreadable or malformed file must not stop the rest of the universe loading
+        file_path = os.path.join(path, filename)
+        try:
+            raw = pd.read_csv(file_path) if ext.lower() == '.csv' else pd.read_parquet(file_path)
+            df = _normalize_history(raw)
+        except Exception:
+            df = None
+        
+        symbol = sanitize_symbol(name)
+        if not symbol or df is None:
+            skipped.append(filename)
+        elif not df.empty:
+            frames[symbol] = df.drop(columns='Symbol', errors='ignore')
+    
+    return frames, skipped
+
+# Function to load a consolidated price database
+@st.cache_resource(max_entries=1, show_spinner=False)  # Only the current source version stays resident
+def _load_price_database(path, mtime):
+    # The whole universe is read with a single query or file read
+    if os.path.splitext(path)[1].lower() in ['.db', '.sqlite', '.sqlite3']:
+        with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+            raw = pd.read_sql_query(f"SELECT * FROM {PRICE_DATABASE_TABLE}", conn)
+    else:
+        raw = pd.read_parquet(path)
+    
+    df = _normalize_history(raw)
+    if df is None or 'Symbol' not in df.columns:
+        raise ValueError("Price database must contain Symbol, Date and Close columns")
+    
+    frames = {}
+    for symbol, group in df.groupby('Symbol', sort=False):
+        symbol = sanitize_symbol(symbol)
+        if symbol:
+            frames[symbol] = group.drop(columns='Symbol')
+    
+    return frames, []
+
+# Function to get the cached local universe for a source version
+def _local_frames(provider, mtime):
+    """Return ({symbol: history}, [skipped file names]) for a local provider"""
+    backend = PROVIDER_BACKENDS[provider]
+    return backend['load'](backend['source'], mtime)
+
+# Function to load all locally stored price history
+def load_local_history(provider, mtime):
+    """Load the whole local universe in one pass, reloading only when the files change.
+    
+    Problems are reported once here, so scans call this before fetching any symbol.
+    """
+    if mtime is None:
+        st.warning(f"Local price data not found at {local_source_path(provider)}")
+        return {}
+    
+    try:
+        frames, skipped = _local_frames(provider, mtime)
+    except Exception as e:
+        st.warning(f"Failed to load local price data: {e}")
+        return {}
+    
+    if skipped:
+        shown = ", ".join(skipped[:5]) + (", ..." if len(skipped) > 5 else "")
+        st.warning(f"Skipped {len(skipped)} local price files that could not be read or lack Date and Close columns: {shown}")
+    
+    return frames
+
+# Function to convert local end-of-day bars to the requested interval
+def _resample_history(df, interval):
+    if interval == "1d":
+        return df
+    if interval == "1wk":
+        # Weekly bars start on Monday, matching Yahoo Finance
+        agg = {col: how for col, how in [('Open', 'first'), ('High', 'max'), ('Low', 'min'),
+                                          ('Close', 'last'), ('Volume', 'sum')] if col in df.columns}
+        return df.resample('W-MON', label='left', closed='left').agg(agg).dropna(subset=['Close'])
+    
+    # Local backends hold end-of-day bars only
+    return None
+
+# Function to limit history to the requested period
+def _trim_period(df, period):
+    if df.empty:
+        return df
+    
+    amount, unit = int(period[:-1]), period[-1]
+    if unit == 'y':
+        start = df.index[-1] - pd.DateOffset(years=amount)
+    else:
+        start = df.index[-1] - pd.Timedelta(days=amount)
+    
+    return df[df.index > start]
+
+# Function to get price history from Yahoo Finance
+def _fetch_yfinance_history(symbol, interval, period, provider, source_mtime):
+    import yfinance as yf
+    return yf.Ticker(symbol).history(period=period, interval=interval)
+
+# Function to get price history from the cached local universe
+def _fetch_local_history(symbol, interval, period, provider, source_mtime):
+    if source_mtime is None:
+        return pd.DataFrame()
+    
+    frames, _ = _local_frames(provider, source_mtime)
+    df = frames.get(symbol)
+    if df is None and symbol.endswith('.NS'):
+        # Local files are often named without the exchange suffix
+        df = frames.get(symbol[:-3])
+    if df is None:
+        return pd.DataFrame()
+    
+    df = _resample_history(df, interval)
+    if df is None:
+        return pd.DataFrame()
+    
+    return _trim_period(df, period).copy()
+
+# Operations of each data provider, keyed by the values of DATA_PROVIDERS.
+# source is the local path (None for network providers), load bulk-loads a local source
+# as ({symbol: history}, [skipped file names]) and fetch returns the history of one symbol
+PROVIDER_BACKENDS = {
+    "yfinance": {"source": None, "load": None, "fetch": _fetch_yfinance_history},
+    "directory": {"source": PRICE_DIRECTORY, "load": _load_price_directory, "fetch": _fetch_local_history},
+    "database": {"source": PRICE_DATABASE, "load": _load_price_database, "fetch": _fetch_local_history}
+}
+
+# Function to get price history from the selected data provider
+def fetch_history(symbol, interval, period, provider=DEFAULT_DATA_PROVIDER, source_mtime=None):
+    """Return OHLCV history for a symbol in the yfinance layout (empty frame if unavailable).
+    
+    source_mtime is the local_source_mtime of a local provider, looked up once by the caller.
+    """
+    return PROVIDER_BACKENDS[provider]['fetch'](symbol, interval, period, provider, source_mtime)
+
 # Function to get stock data and calculate EMAs
-@st.cache_data(ttl=3600)
-def get_stock_data(symbol, timeframe):
+def get_stock_data(symbol, timeframe, market, provider=DEFAULT_DATA_PROVIDER, source_mtime=None):
+    # Not cached per process: scans keep Close/EMA values in the shared price panel instead
     try:
         # Sanitize symbol before API call
         symbol = sanitize_symbol(symbol)
         if not symbol:
             return None
             
-        stock = yf.Ticker(symbol)
-        
-        # Set period based on timeframe
-        if timeframe == "1d":
-            period = "500d"
-        elif timeframe == "1wk":
-            period = "7y"
-        else:  # 1h
-            period = "90d"
-            
-        df = stock.history(period=period, interval=timeframe)
+        df = fetch_history(symbol, timeframe, TIMEFRAME_PERIODS.get(timeframe, "90d"), provider, source_mtime)
+        
+        # Drop bars that are still forming, so the data matches its freshness key (data_as_of)
+        cutoff = last_bar_close(market, timeframe, time.time() - BAR_SETTLE_DELAY)
+        forming = 0
+        while forming < len(df) and bar_close_time(market, timeframe, df.index[-1 - forming]) > cutoff:
+            forming += 1
+        if forming:
+            df = df.iloc[:len(df) - forming].copy()
         
         if df.empty or len(df) < 200:  # Ensure we have enough data for EMAs
             return None
@@ -383,19 +724,264 @@ def get_stock_data(symbol, timeframe):
     except Exception as e:
         return None
 
-# Function to check EMA alignment
-def check_ema_alignment(df):
-    if df is None or df.empty:
-        return None, None
+# Function to get the latest quote of an index as (current, previous), or None
+def _index_quote(symbol, provider, source_mtime):
+    try:
+        index_data = fetch_history(sanitize_symbol(symbol), "1d", "1d", provider, source_mtime)
+        if index_data.empty:
+            return None
+        return float(index_data['Close'].iloc[-1]), float(index_data['Open'].iloc[-1])
+    except Exception:
+        return None
+
+# Function to get the index quotes for the Market Status block
+@st.cache_data(ttl=8 * 86400, max_entries=100)  # The TTL outlasts the longest gap between bars
+def get_index_quotes(market, provider=DEFAULT_DATA_PROVIDER, as_of=None, source_mtime=None):
+    # Keyed on as_of (see data_as_of), so quotes are not refetched outside the session
+    indices = india_indices if market == "India" else us_indices
+    if not is_local_provider(provider):
+        # Fetch all quotes at once instead of one after another. Only the network calls
+        # run in worker threads; they make no Streamlit calls, so none are lost there
+        with ThreadPoolExecutor(max_workers=len(indices)) as executor:
+            quotes = list(executor.map(_index_quote, indices.values(),
+                                       [provider] * len(indices), [source_mtime] * len(indices)))
+    else:
+        # Local sources are read from the in-memory cache on the script thread
+        quotes = [_index_quote(symbol, provider, source_mtime) for symbol in indices.values()]
+    return dict(zip(indices.keys(), quotes))
+
+# Function to get the file prefix of the shared price panel
+def _panel_name(timeframe, provider):
+    # Each data provider keeps its own panel so sources never mix
+    return f"panel_{provider}_{timeframe}"
+
+# Function to read the currently published panel manifest
+def read_panel_manifest(timeframe, provider=DEFAULT_DATA_PROVIDER):
+    """Return the published panel manifest for a timeframe, or None if there is none"""
+    try:
+        with open(os.path.join(PANEL_DIR, _panel_name(timeframe, provider) + '.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Function to map one panel segment read-only
+@st.cache_resource(max_entries=64)
+def _map_panel_segment(path):
+    # Segment files never change once written, so each is mapped once per process
+    return np.load(path, mmap_mode='r')
+
+# Function to map one panel version read-only
+@st.cache_resource(max_entries=6)
+def _open_price_panel(index_file):
+    # Version indexes are immutable, so one mapping per process is shared by every session
+    with open(index_file) as f:
+        index = json.load(f)
     
-    # Get the latest values
-    latest = df.iloc[-1]
-    close_price = latest['Close']
-    ema20 = latest['EMA20']
-    ema50 = latest['EMA50']
-    ema100 = latest['EMA100']
-    ema200 = latest['EMA200']
+    return {
+        'segments': [_map_panel_segment(os.path.join(PANEL_DIR, filename)) for filename in index['segments']],
+        'segment_files': index['segments'],
+        'symbols': index['symbols'],
+        'positions': {symbol: i for i, symbol in enumerate(index['symbols'])},
+        'segment': index['segment'],
+        'row': index['row'],
+        'updated': index['updated']
+    }
+
+# Function to load the shared price panel
+def load_price_panel(timeframe, provider=DEFAULT_DATA_PROVIDER):
+    """Map the latest published panel without copying it.
+    
+    The panel is a list of segments, each a (fields x symbols x bars) array, plus an index
+    that points every symbol at the segment and row holding its newest data.
+    """
+    manifest = read_panel_manifest(timeframe, provider)
+    if manifest is None:
+        return None
+    
+    try:
+        panel = _open_price_panel(os.path.join(PANEL_DIR, manifest['index_file']))
+    except (OSError, ValueError, KeyError):
+        return None
+    
+    return dict(panel, version=manifest['version'], published=manifest['published'])
+
+# Function to get the (fields x bars) row of a symbol position in the panel
+def panel_row(panel, position):
+    return panel['segments'][panel['segment'][position]][:, panel['row'][position], :]
+
+# Function to get the cached snapshot of a symbol from the panel, however old it is
+def panel_snapshot(panel, symbol):
+    """Return (latest Close/EMA values, recent closes, update time) of a symbol, or None"""
+    if panel is None:
+        return None
+    
+    position = panel['positions'].get(symbol)
+    if position is None:
+        return None
+    
+    # Bars are right-aligned, so the last column is always the latest bar
+    row = panel_row(panel, position)
+    latest = row[:, -1]
+    if np.isnan(latest).any():
+        return None
+    
+    closes = row[0, -(VOLATILITY_LOOKBACK + 1):]
+    return tuple(float(value) for value in latest), closes[~np.isnan(closes)], panel['updated'][position]
+
+# Function to get the latest Close/EMA snapshot of a symbol from the panel
+def panel_latest(panel, symbol, as_of):
+    snapshot = panel_snapshot(panel, symbol)
+    
+    # Rows updated before the latest expected bar closed are stale
+    if snapshot is None or snapshot[2] < as_of:
+        return None
+    
+    return snapshot[0]
+
+# Function to take the single-writer lock of the panel
+def _acquire_panel_lock(lock_path):
+    """Return the open lock file if this process may write the panel, otherwise None.
+    
+    The lock is held by the operating system, so it is released when the writer exits
+    or crashes and a stale lock never has to be removed by hand.
+    """
+    lock_file = open(lock_path, 'a+')
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    
+    return lock_file
+
+# Function to find the highest panel version written to disk
+def _latest_panel_version(name):
+    versions = [0]
+    for filename in os.listdir(PANEL_DIR):
+        match = re.fullmatch(rf"{re.escape(name)}\.[vs](\d+)\.(?:json|npy)", filename)
+        if match:
+            versions.append(int(match.group(1)))
+    return max(versions)
+
+# Function to publish freshly fetched data into the shared price panel
+def publish_price_panel(frames, fetched_at, timeframe, provider=DEFAULT_DATA_PROVIDER):
+    """Append fetched frames to the panel as a new segment and publish it atomically.
+    
+    fetched_at maps each symbol to the time its fetch started, which is stored as the
+    row's update time. Only the refreshed rows are written; every other symbol keeps
+    pointing at the segment it is already in. Once PANEL_MAX_SEGMENTS segments exist, all
+    live rows are compacted into one. Readers keep using the version they mapped until
+    they load the manifest again. If another process is already writing, or the current
+    panel cannot be read, the update is skipped.
+    """
+    if not frames:
+        return False
+    
+    os.makedirs(PANEL_DIR, exist_ok=True)
+    name = _panel_name(timeframe, provider)
+    lock_file = _acquire_panel_lock(os.path.join(PANEL_DIR, name + '.lock'))
+    if lock_file is None:
+        return False
     
+    try:
+        current = load_price_panel(timeframe, provider)
+        manifest_path = os.path.join(PANEL_DIR, name + '.json')
+        if current is None and os.path.exists(manifest_path):
+            # Rebuilding from nothing would drop every symbol that was not refreshed
+            return False
+        
+        # Never reuse a file name that another process may still have mapped
+        version = max(current['version'] if current else 0, _latest_panel_version(name)) + 1
+        
+        # Start from the current index and append new symbols at the end
+        symbols = list(current['symbols']) if current else []
+        segment_files = list(current['segment_files']) if current else []
+        segment_of = list(current['segment']) if current else []
+        row_of = list(current['row']) if current else []
+        updated = list(current['updated']) if current else []
+        positions = dict(current['positions']) if current else {}
+        for symbol in frames:
+            if symbol not in positions:
+                positions[symbol] = len(symbols)
+                symbols.append(symbol)
+                segment_of.append(None)
+                row_of.append(None)
+                updated.append(None)
+        
+        # Rows to write: the refreshed symbols, plus every other live row when compacting
+        rows = {symbol: df[PANEL_FIELDS].to_numpy(dtype=np.float64)[-PANEL_MAX_BARS:].T
+                for symbol, df in frames.items()}
+        if current and len(segment_files) >= PANEL_MAX_SEGMENTS:
+            for symbol in current['symbols']:
+                if symbol not in rows:
+                    rows[symbol] = panel_row(current, current['positions'][symbol])
+            segment_files = []
+        
+        n_bars = min(max(values.shape[1] for values in rows.values()), PANEL_MAX_BARS)
+        segment_file = f"{name}.s{version}.npy"
+        data = np.lib.format.open_memmap(
+            os.path.join(PANEL_DIR, segment_file), mode='w+', dtype=np.float64,
+            shape=(len(PANEL_FIELDS), len(rows), n_bars)
+        )
+        segment = len(segment_files)
+        segment_files.append(segment_file)
+        
+        for row, (symbol, values) in enumerate(rows.items()):
+            # Right-align the bars and pad older history with NaN
+            keep = min(values.shape[1], n_bars)
+            data[:, row, :n_bars - keep] = np.nan
+            data[:, row, n_bars - keep:] = values[:, values.shape[1] - keep:]
+            
+            position = positions[symbol]
+            segment_of[position] = segment
+            row_of[position] = row
+            if symbol in frames:
+                updated[position] = fetched_at[symbol]
+        
+        data.flush()
+        del data
+        
+        index_file = f"{name}.v{version}.json"
+        with open(os.path.join(PANEL_DIR, index_file), 'w') as f:
+            json.dump({
+                'segments': segment_files,
+                'symbols': symbols,
+                'segment': segment_of,
+                'row': row_of,
+                'updated': updated
+            }, f)
+        
+        # Swap the manifest in one step so readers never see a half-written version
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump({'version': version, 'index_file': index_file, 'published': time.time()}, f)
+        os.replace(manifest_path + '.tmp', manifest_path)
+        
+        # Drop files that neither this version nor the previous one uses;
+        # mapped copies stay valid until they are unmapped
+        in_use = set(segment_files) | set(current['segment_files'] if current else [])
+        for filename in os.listdir(PANEL_DIR):
+            index_match = re.fullmatch(rf"{re.escape(name)}\.v(\d+)\.json", filename)
+            segment_match = re.fullmatch(rf"{re.escape(name)}\.s\d+\.npy", filename)
+            if (index_match and int(index_match.group(1)) < version - 1) or (segment_match and filename not in in_use):
+                try:
+                    os.remove(os.path.join(PANEL_DIR, filename))
+                except OSError:
+                    pass
+        
+        return True
+    except Exception as e:
+        st.warning(f"Failed to update shared price panel: {e}")
+        return False
+    finally:
+        lock_file.close()
+
+# Function to classify the latest Close and EMA values
+def classify_alignment(close_price, ema20, ema50, ema100, ema200):
     # Check bullish alignment: Close > EMA20 > EMA50 > EMA100 > EMA200
     is_bullish = (close_price > ema20 > ema50 > ema100 > ema200)
     
@@ -409,8 +995,79 @@ def check_ema_alignment(df):
     else:
         return None, None
 
+# Function to check EMA alignment
+def check_ema_alignment(df):
+    if df is None or df.empty:
+        return None, None
+    
+    # Get the latest values
+    latest = df.iloc[-1]
+    return classify_alignment(
+        latest['Close'], latest['EMA20'], latest['EMA50'], latest['EMA100'], latest['EMA200']
+    )
+
+# Function to measure each neighbour gap against the largest move the new bars can make
+def _gap_margins(base, weights, reach):
+    """Return each gap (base[i] - base[i + 1]) in units of the most any allowed path can move it.
+    
+    weights[i] holds the sensitivity of value i to each new close and reach the largest
+    move of each close. The worst path pushes every close to the end of its range that
+    moves the gap the most, so no allowed path flips a gap whose margin is above 1.
+    """
+    margins = []
+    for i in range(len(base) - 1):
+        gap = base[i] - base[i + 1]
+        worst = float(np.sum(np.abs(weights[i] - weights[i + 1]) * reach))
+        if worst > 0:
+            margins.append(gap / worst)
+        else:
+            margins.append(np.inf if gap > 0 else -np.inf if gap < 0 else 0.0)
+    return np.array(margins)
+
+# Function to measure how safely a cached classification survives new bars
+def alignment_margin(latest, closes, bars):
+    """Classify a cached snapshot and return (trend, margin).
+    
+    Each new close is assumed to stay within UNCERTAINTY_SIGMAS bar volatilities of the
+    snapshot close, scaled by the square root of the bars since the snapshot. The
+    EMAs depend on the whole path, so every close in that band is allowed separately.
+    The margin is how far the worst such path is from changing the classification: above
+    1 no path within the band flips it and the symbol does not need to be refreshed.
+    """
+    trend, _ = classify_alignment(*latest)
+    if bars <= 0:
+        return trend, np.inf
+    if len(closes) < 3:
+        return trend, 0.0
+    
+    volatility = float(np.std(np.diff(closes) / closes[:-1]))
+    if not volatility > 0:
+        return trend, 0.0
+    
+    # Largest move of each new close, and how much each value depends on it
+    close = latest[0]
+    steps = np.arange(1, bars + 1)
+    reach = UNCERTAINTY_SIGMAS * volatility * np.sqrt(steps) * close
+    base = [close]
+    weights = [(steps == bars).astype(float)]  # The close is the last new close
+    for ema, span in zip(latest[1:], EMA_SPANS):
+        alpha = 2 / (span + 1)
+        decay = (1 - alpha) ** bars
+        # Value if every new close equals the snapshot close
+        base.append(ema + (1 - decay) * (close - ema))
+        weights.append(alpha * (1 - alpha) ** (bars - steps))
+    
+    margins = _gap_margins(base, weights, reach)
+    if trend == "Bullish":
+        return trend, max(float(margins.min()), 0.0)
+    if trend == "Bearish":
+        return trend, max(float((-margins).min()), 0.0)
+    
+    # Entering an alignment needs every gap that blocks it to flip
+    return trend, max(min(float((-margins).max()), float(margins.max())), 0.0)
+
 # Function to scan all stocks for EMA alignment
-def scan_ema_alignment(stock_list, timeframe, market):
+def scan_ema_alignment(stock_list, timeframe, market, provider=DEFAULT_DATA_PROVIDER, two_phase=True):
     results = []
     
     progress_bar = st.progress(0)
@@ -430,18 +1087,73 @@ def scan_ema_alignment(stock_list, timeframe, market):
     }
     timeframe_display = timeframe_display_map.get(timeframe, timeframe)
     
+    # Check a local source once, up front, instead of failing once per symbol
+    source_mtime = None
+    if is_local_provider(provider):
+        source_mtime = local_source_mtime(provider)
+        if not load_local_history(provider, source_mtime):
+            progress_bar.empty()
+            status_text.empty()
+            return pd.DataFrame()
+    
+    # Map the shared price panel once; fresh symbols are read from it instead of fetched
+    panel = load_price_panel(timeframe, provider)
+    as_of = data_as_of(market, timeframe, source_mtime=source_mtime)
+    fetched_frames = {}
+    fetched_at = {}
+    
+    # Two-phase bookkeeping: bars missed per snapshot time, and snapshot accuracy
+    now = time.time()
+    missed_bars = {}
+    snapshot_count = 0
+    checked_count = 0
+    matched_count = 0
+    
     for i, (symbol, name) in enumerate(zip(stock_list['Symbol'], stock_list['Company Name'])):
         status_text.text(f"Scanning {market} stocks: {i+1}/{total_stocks} - {name} ({symbol})")
         progress_bar.progress((i + 1) / total_stocks)
         
-        df = get_stock_data(symbol, timeframe)
+        # A full refresh fetches every symbol, including ones the panel already has up to date
+        latest = panel_latest(panel, symbol, as_of) if two_phase else None
+        snapshot = panel_snapshot(panel, symbol) if latest is None else None
         
-        if df is None or df.empty:
-            continue
-            
-        processed_count += 1
+        # Phase one: classify from the cached snapshot and measure how close it is to flipping
+        predicted_trend, margin = None, 0.0
+        if snapshot is not None:
+            updated = snapshot[2]
+            if updated not in missed_bars:
+                # A stale row has missed at least one bar, even if only the local files changed
+                missed_bars[updated] = max(1, bars_closed_between(
+                    market, timeframe, updated - BAR_SETTLE_DELAY, now - BAR_SETTLE_DELAY
+                ))
+            predicted_trend, margin = alignment_margin(snapshot[0], snapshot[1], missed_bars[updated])
         
-        trend, status_emoji = check_ema_alignment(df)
+        if latest is not None:
+            processed_count += 1
+            trend, status_emoji = classify_alignment(*latest)
+        elif two_phase and margin > 1:
+            processed_count += 1
+            snapshot_count += 1
+            trend = predicted_trend
+        else:
+            # Phase two: refresh symbols that the new bars could flip (or every symbol)
+            fetch_started = time.time()
+            df = get_stock_data(symbol, timeframe, market, provider, source_mtime)
+            
+            if df is None or df.empty:
+                continue
+            
+            processed_count += 1
+            trend, status_emoji = check_ema_alignment(df)
+            
+            # Keep only what the panel stores until it is published
+            fetched_frames[symbol] = df[PANEL_FIELDS].iloc[-PANEL_MAX_BARS:]
+            fetched_at[symbol] = fetch_started
+            
+            # A full refresh checks how often a confident snapshot, fresh or stale, would have been right
+            if margin > 1:
+                checked_count += 1
+                matched_count += trend == predicted_trend
         
         if trend:  # Only add if bullish or bearish alignment found
             # Remove .NS suffix and ^ symbol for display
@@ -460,10 +1172,20 @@ def scan_ema_alignment(stock_list, timeframe, market):
     progress_bar.empty()
     status_text.empty()
     
+    # Share newly fetched data with other sessions and processes
+    publish_price_panel(fetched_frames, fetched_at, timeframe, provider)
+    
     # Show summary of scan results
     if processed_count < total_stocks:
         st.info(f"Note: Data for {total_stocks - processed_count} stocks could not be retrieved or processed.")
     
+    if snapshot_count:
+        st.info(f"Two-phase scan: {snapshot_count} of {processed_count} stocks were classified from cached data "
+                f"and {len(fetched_frames)} were refreshed.")
+    if checked_count:
+        st.info(f"Two-phase accuracy: {matched_count}/{checked_count} confident cached classifications "
+                f"({matched_count / checked_count:.1%}) matched the full refresh.")
+    
     return pd.DataFrame(results) if results else pd.DataFrame()
 
 # Function to create formatted Excel file
@@ -474,6 +1196,9 @@ def create_formatted_excel(df, filename):
     # Create a copy of dataframe for export (without Original_Symbol)
     export_df = df[['Symbol', 'Company Name', 'Trend', 'Timeframe', 'Date']].copy()
     
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill
+    
     # Create Excel file in memory
     output = io.BytesIO()
     
@@ -533,13 +1258,48 @@ def create_formatted_excel(df, filename):
         st.error(f"Error creating Excel file: {e}")
         return None
 
+# Function to display index quotes in the Market Status block
+def display_market_status(index_cols, market, provider):
+    source_mtime = local_source_mtime(provider)
+    quotes_as_of = data_as_of(market, "quote", source_mtime=source_mtime)
+    quotes = get_index_quotes(market, provider, quotes_as_of, source_mtime)
+    
+    for i, (index_name, quote) in enumerate(quotes.items()):
+        try:
+            if quote is not None:
+                current, previous = quote
+                change = current - previous
+                change_percent = (change / previous) * 100
+                
+                color = "green" if change >= 0 else "red"
+                change_icon = "▲" if change >= 0 else "▼"
+                
+                index_cols[i].markdown(
+                    f"**{index_name}**: {current:.2f} "
+                    f"<span style='color:{color}'>{change_icon} {abs(change):.2f} ({abs(change_percent):.2f}%)</span>", 
+                    unsafe_allow_html=True
+                )
+            else:
+                index_cols[i].text(f"{index_name}: Data unavailable")
+        except:
+            index_cols[i].text(f"{index_name}: Data unavailable")
+
 # Main application
 def main():
+    # Page configuration 
+    st.set_page_config(
+        page_title="EMA Alignment Scanner",
+        page_icon="📊",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(APP_CSS, unsafe_allow_html=True)
+    
     st.title("EMA Alignment Scanner")
     
-    # Display current market status at the top
+    # Display current market status at the top (quotes are filled in later)
     st.subheader("Market Status")
-    col1, col2, col3 = st.columns(3)
+    index_cols = st.columns(3)
     
     # Initialize session state for managing stock lists
     if 'using_custom_list' not in st.session_state:
@@ -548,9 +1308,6 @@ def main():
     # Sidebar
     st.sidebar.header("Scanner Settings")
     
-    # Load default stock lists
-    us_stocks, india_stocks = load_stock_lists()
-    
     # Custom stock list upload
     st.sidebar.subheader("Stock List")
     uploaded_file = st.sidebar.file_uploader(
@@ -600,44 +1357,35 @@ def main():
     timeframe_display = st.sidebar.selectbox("Select Timeframe", list(timeframe_options.keys()), index=0)  # Default to Daily
     timeframe = timeframe_options[timeframe_display]
     
-    # Scan button
-    scan_button = st.sidebar.button("Start EMA Alignment Scan", use_container_width=True)
+    # Data source selection
+    provider_names = list(DATA_PROVIDERS.keys())
+    provider_default = list(DATA_PROVIDERS.values()).index(DEFAULT_DATA_PROVIDER)
+    provider_display = st.sidebar.selectbox("Data Source", provider_names, index=provider_default)
+    provider = DATA_PROVIDERS[provider_display]
     
-    # Display current market status data
-    indices = india_indices if market == "India" else us_indices
+    # Scan mode selection
+    scan_mode = st.sidebar.selectbox(
+        "Scan Mode",
+        list(SCAN_MODES.keys()),
+        help="Two-Phase refreshes only stocks that one new bar could move into or out of alignment"
+    )
     
-    index_cols = [col1, col2, col3]
-    for i, (index_name, index_symbol) in enumerate(indices.items()):
-        try:
-            # Sanitize index symbol
-            sanitized_index_symbol = sanitize_symbol(index_symbol)
-            index_data = yf.Ticker(sanitized_index_symbol).history(period="1d")
-            if not index_data.empty:
-                current = index_data['Close'].iloc[-1]
-                previous = index_data['Open'].iloc[-1]
-                change = current - previous
-                change_percent = (change / previous) * 100
-                
-                color = "green" if change >= 0 else "red"
-                change_icon = "▲" if change >= 0 else "▼"
-                
-                index_cols[i].markdown(
-                    f"**{index_name}**: {current:.2f} "
-                    f"<span style='color:{color}'>{change_icon} {abs(change):.2f} ({abs(change_percent):.2f}%)</span>", 
-                    unsafe_allow_html=True
-                )
-        except:
-            index_cols[i].text(f"{index_name}: Data unavailable")
+    # Scan button
+    scan_button = st.sidebar.button("Start EMA Alignment Scan", use_container_width=True)
     
     if scan_button:
-        # Use custom stock list if uploaded, otherwise use default
+        # Show the quotes first so they are visible while the scan runs
+        display_market_status(index_cols, market, provider)
+        
+        # Use custom stock list if uploaded, otherwise load the default list
         if st.session_state.using_custom_list:
             stocks_to_scan = st.session_state.custom_stocks
         else:
+            us_stocks, india_stocks = load_stock_lists(_stock_lists_mtime())
             stocks_to_scan = india_stocks if market == "India" else us_stocks
         
         with st.spinner(f"Scanning {market} stocks for EMA alignment on {timeframe_display} timeframe..."):
-            results_df = scan_ema_alignment(stocks_to_scan, timeframe, market)
+            results_df = scan_ema_alignment(stocks_to_scan, timeframe, market, provider, SCAN_MODES[scan_mode])
         
         # Store results in session state
         st.session_state.results_df = results_df
@@ -667,6 +1415,10 @@ def main():
         - **Hourly**: Uses 90 days of data for swing analysis
         - **Weekly**: Uses 7 years of data for long-term analysis
         
+        ### Scan Modes
+        - **Two-Phase**: Stocks are first classified from cached data; only stocks that a price move within 4 recent volatilities could flip are refreshed, so a larger move can still be missed until the next refresh
+        - **Full Refresh**: Every stock is refreshed from the data source, even if its cached data is current, and the accuracy of the cached classifications is reported
+        
         ### Important Notes
         - All EMAs are calculated precisely using exponential weighting
         - Only stocks with perfect alignment are shown
@@ -751,6 +1503,10 @@ def main():
         st.info("No stocks found with perfect EMA alignment. Try scanning with different parameters.")
     else:
         st.info("Click 'Start EMA Alignment Scan' to begin scanning for stocks with perfect EMA alignment.")
+    
+    # Index quotes are fetched last so they never hold up the rest of the page
+    if not scan_button:
+        display_market_status(index_cols, market, provider)
 
 # Run the application
 if __name__ == "__main__":
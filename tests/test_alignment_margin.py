@@ -0,0 +1,71 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+import ema_scanner
+
+BULLISH = (110.0, 105.0, 100.0, 95.0, 90.0)
+
+
+# Function to build closes whose bar-to-bar moves alternate between +move and -move
+def alternating_closes(move, bars=ema_scanner.VOLATILITY_LOOKBACK):
+    returns = np.tile([move, -move], bars // 2)
+    return 100 * np.cumprod(np.concatenate([[1.0], 1 + returns]))
+
+# Function to apply new closes to a Close/EMA snapshot
+def apply_closes(latest, closes):
+    values = list(latest)
+    for close in closes:
+        values = [close] + [ema + 2 / (span + 1) * (close - ema)
+                            for ema, span in zip(values[1:], ema_scanner.EMA_SPANS)]
+    return values
+
+
+def test_known_bullish_snapshot_margin():
+    trend, margin = ema_scanner.alignment_margin(BULLISH, alternating_closes(0.01), 1)
+
+    # The tightest gap is Close - EMA20: one close must fall 5 points, against a reach of 4 x 1% of 110
+    assert trend == "Bullish"
+    assert margin == pytest.approx(5 / (ema_scanner.UNCERTAINTY_SIGMAS * 0.01 * 110))
+
+
+def test_margin_shrinks_as_bars_are_missed():
+    closes = alternating_closes(0.01)
+    margins = [ema_scanner.alignment_margin(BULLISH, closes, bars)[1] for bars in [1, 2, 5, 20]]
+
+    assert margins == sorted(margins, reverse=True)
+    assert ema_scanner.alignment_margin(BULLISH, closes, 0) == ("Bullish", np.inf)
+
+
+def test_no_path_within_the_band_flips_a_confident_snapshot():
+    closes = alternating_closes(0.002)
+    bars = 4
+    trend, margin = ema_scanner.alignment_margin(BULLISH, closes, bars)
+    assert margin > 1
+
+    # Dips followed by recoveries (and every other extreme path) keep the alignment
+    reach = ema_scanner.UNCERTAINTY_SIGMAS * 0.002 * np.sqrt(np.arange(1, bars + 1))
+    for signs in product([-1, 1], repeat=bars):
+        path = BULLISH[0] * (1 + np.array(signs) * reach)
+        assert ema_scanner.classify_alignment(*apply_closes(BULLISH, path))[0] == trend
+
+
+def test_snapshot_near_a_boundary_is_uncertain():
+    trend, margin = ema_scanner.alignment_margin((105.1, 105.0, 100.0, 95.0, 90.0), alternating_closes(0.01), 1)
+
+    assert trend == "Bullish"
+    assert margin < 1
+
+
+def test_unaligned_snapshot_far_from_both_alignments():
+    # Close and EMA100 sit on opposite sides of the middle EMAs
+    trend, margin = ema_scanner.alignment_margin((100.0, 110.0, 90.0, 120.0, 80.0), alternating_closes(0.001), 1)
+
+    assert trend is None
+    assert margin > 1
+
+
+def test_flat_history_gives_no_margin():
+    assert ema_scanner.alignment_margin(BULLISH, np.full(51, 100.0), 1) == ("Bullish", 0.0)
+    assert ema_scanner.alignment_margin(BULLISH, np.array([100.0, 101.0]), 1) == ("Bullish", 0.0)
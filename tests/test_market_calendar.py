@@ -0,0 +1,55 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import ema_scanner
+
+NEW_YORK = ZoneInfo("America/New_York")
+KOLKATA = ZoneInfo("Asia/Kolkata")
+
+
+# Function to convert a wall-clock time on an exchange to epoch seconds
+def at(tz, *args):
+    return datetime(*args, tzinfo=tz).timestamp()
+
+
+def test_daily_close_skips_holidays():
+    # Thanksgiving 2024 is closed, so the latest daily bar is Wednesday's
+    assert ema_scanner.last_bar_close("US", "1d", at(NEW_YORK, 2024, 11, 28, 20)) == at(NEW_YORK, 2024, 11, 27, 16)
+    # Republic Day 2024 is an NSE holiday
+    assert ema_scanner.last_bar_close("India", "1d", at(KOLKATA, 2024, 1, 26, 20)) == at(KOLKATA, 2024, 1, 25, 15, 30)
+
+
+def test_daily_close_uses_early_closes():
+    assert ema_scanner.last_bar_close("US", "1d", at(NEW_YORK, 2024, 11, 29, 20)) == at(NEW_YORK, 2024, 11, 29, 13)
+
+
+def test_weekly_close_moves_to_the_last_session_of_the_week():
+    # Good Friday 2024: the weekly bar closes on Thursday
+    assert ema_scanner.last_bar_close("US", "1wk", at(NEW_YORK, 2024, 3, 30, 12)) == at(NEW_YORK, 2024, 3, 28, 16)
+    assert ema_scanner.bar_close_time("US", "1wk", "2024-03-25") == at(NEW_YORK, 2024, 3, 28, 16)
+    # Before Thursday's close the latest weekly bar is the previous week's
+    assert ema_scanner.last_bar_close("US", "1wk", at(NEW_YORK, 2024, 3, 28, 12)) == at(NEW_YORK, 2024, 3, 22, 16)
+    assert ema_scanner.last_bar_close("India", "1wk", at(KOLKATA, 2024, 1, 27, 12)) == at(KOLKATA, 2024, 1, 25, 15, 30)
+
+
+def test_hourly_bars_stop_at_an_early_close():
+    # 9:30 to 13:00 leaves 10:30, 11:30, 12:30 and a short bar closing at 13:00
+    start, end = at(NEW_YORK, 2024, 11, 29, 9), at(NEW_YORK, 2024, 11, 29, 18)
+    assert ema_scanner.bars_closed_between("US", "1h", start, end) == 4
+    assert ema_scanner.bar_close_time("US", "1h", datetime(2024, 11, 29, 12, 30, tzinfo=NEW_YORK)) == at(NEW_YORK, 2024, 11, 29, 13)
+
+
+def test_bars_closed_between_counts_sessions_only():
+    # Thanksgiving and the weekend are skipped: Friday, Monday and Tuesday remain
+    start, end = at(NEW_YORK, 2024, 11, 27, 17), at(NEW_YORK, 2024, 12, 3, 17)
+    assert ema_scanner.bars_closed_between("US", "1d", start, end) == 3
+    assert ema_scanner.bars_closed_between("US", "1d", end, end) == 0
+
+
+def test_data_as_of_waits_for_the_settle_delay():
+    close = at(NEW_YORK, 2024, 11, 27, 16)
+    # Just after the close the previous bar is still the latest settled one
+    assert ema_scanner.data_as_of("US", "1d", now=close + 60) == at(NEW_YORK, 2024, 11, 26, 16) + ema_scanner.BAR_SETTLE_DELAY
+    assert ema_scanner.data_as_of("US", "1d", now=close + 3600) == close + ema_scanner.BAR_SETTLE_DELAY
+    # Local files written after the bar settled make newer data
+    assert ema_scanner.data_as_of("US", "1d", now=close + 3600, source_mtime=close + 1800) == close + 1800
@@ -0,0 +1,96 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ema_scanner
+
+
+# Fixture to give each test its own empty panel directory
+@pytest.fixture
+def panel_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ema_scanner, 'PANEL_DIR', str(tmp_path))
+    monkeypatch.setattr(ema_scanner, 'PANEL_MAX_SEGMENTS', 3)
+    return tmp_path
+
+# Function to build a Close/EMA frame whose values count up from a given number
+def make_frame(start, bars=30):
+    values = np.arange(bars, dtype=float) + start
+    return pd.DataFrame({field: values for field in ema_scanner.PANEL_FIELDS},
+                        index=pd.date_range('2024-01-01', periods=bars))
+
+# Function to list the panel files with a given suffix
+def panel_files(panel_dir, suffix):
+    return sorted(name for name in os.listdir(panel_dir) if name.endswith(suffix))
+
+# Function to publish one symbol into the test panel
+def publish(symbol, start, fetched_at=1000.0):
+    return ema_scanner.publish_price_panel({symbol: make_frame(start)}, {symbol: fetched_at}, "1d", "yfinance")
+
+
+def test_publish_and_compact_keep_every_symbol(panel_dir):
+    expected = {}
+    for version in range(1, 8):
+        # Refresh one symbol every time and add a new one with a shorter history
+        frames = {'AAPL': make_frame(100 * version), f"S{version}": make_frame(version, bars=20 + version)}
+        fetched_at = {symbol: 1000.0 * version for symbol in frames}
+        assert ema_scanner.publish_price_panel(frames, fetched_at, "1d", "yfinance")
+        expected.update({symbol: (frame, fetched_at[symbol]) for symbol, frame in frames.items()})
+
+        panel = ema_scanner.load_price_panel("1d", "yfinance")
+        assert panel['version'] == version
+        assert len(panel['segment_files']) <= ema_scanner.PANEL_MAX_SEGMENTS
+        for symbol, (frame, updated) in expected.items():
+            latest, closes, row_updated = ema_scanner.panel_snapshot(panel, symbol)
+            assert latest == tuple(frame[ema_scanner.PANEL_FIELDS].iloc[-1])
+            assert list(closes) == list(frame['Close'].iloc[-len(closes):])
+            assert row_updated == updated
+
+    # Only the files of the current and previous version are left on disk
+    previous = json.loads((panel_dir / "panel_yfinance_1d.v6.json").read_text())
+    assert panel_files(panel_dir, '.npy') == sorted(set(panel['segment_files']) | set(previous['segments']))
+    assert panel_files(panel_dir, '.json') == [
+        "panel_yfinance_1d.json", "panel_yfinance_1d.v6.json", "panel_yfinance_1d.v7.json"
+    ]
+
+
+def test_rows_are_fresh_only_if_fetched_after_the_bar(panel_dir):
+    assert publish('AAPL', 1, fetched_at=1000.0)
+    panel = ema_scanner.load_price_panel("1d", "yfinance")
+
+    assert ema_scanner.panel_latest(panel, 'AAPL', 900.0) is not None
+    assert ema_scanner.panel_latest(panel, 'AAPL', 1100.0) is None
+    assert ema_scanner.panel_latest(panel, 'MSFT', 900.0) is None
+
+
+def test_publish_is_skipped_while_another_process_writes(panel_dir):
+    lock_file = ema_scanner._acquire_panel_lock(str(panel_dir / "panel_yfinance_1d.lock"))
+    try:
+        assert not publish('AAPL', 1)
+    finally:
+        lock_file.close()
+
+    assert ema_scanner.load_price_panel("1d", "yfinance") is None
+    assert publish('AAPL', 1)
+
+
+def test_unreadable_manifest_skips_the_publish(panel_dir):
+    assert publish('AAPL', 1)
+    segments = panel_files(panel_dir, '.npy')
+    (panel_dir / "panel_yfinance_1d.json").write_text("{")
+
+    assert not publish('MSFT', 2)
+    assert panel_files(panel_dir, '.npy') == segments
+
+
+def test_versions_continue_after_the_manifest_is_lost(panel_dir):
+    assert publish('AAPL', 1)
+    assert publish('AAPL', 2)
+    os.remove(panel_dir / "panel_yfinance_1d.json")
+
+    assert publish('MSFT', 3)
+    panel = ema_scanner.load_price_panel("1d", "yfinance")
+    assert panel['version'] == 3
+    assert panel['segment_files'] == ["panel_yfinance_1d.s3.npy"]